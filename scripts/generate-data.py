@@ -6,19 +6,37 @@ Generates and sends transactions to the ingest API
 
 Usage: python3 scripts/generate-data.py [count] [delay_ms]
 Example: python3 scripts/generate-data.py 100 200
+
+Requires: pip install httpx numpy (orjson and numba are used when installed)
 """
 
 import sys
 import json
-import random
-import time
-import urllib.request
-import urllib.error
+import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, List
 
+import httpx
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; the numeric kernel then runs as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
 INGEST_API_URL = "http://localhost:8080"
 
+# Maximum number of requests in flight at once
+MAX_IN_FLIGHT = 32
+# Minimum gap between two ALLOW transactions of the same user (avoids burst detection)
+ALLOW_SPACING_S = 0.5
+
 # Sample data pools
 USERS = [
     'alice', 'bob', 'charlie', 'diana', 'eve', 'frank', 'grace', 'henry',
@@ -34,6 +52,14 @@ MERCHANTS = [
 
 CURRENCIES = ['USD', 'EUR', 'GBP', 'CAD', 'AUD']
 
+# Transaction type codes used by the numeric kernel
+ALLOW, REVIEW, BLOCK = 0, 1, 2
+TYPE_CODES = {'allow': ALLOW, 'review': REVIEW, 'block': BLOCK}
+
+EPOCH = datetime(1970, 1, 1)
+HOUR_US = 3_600_000_000
+DAY_US = 24 * HOUR_US
+
 CITIES = [
     {'city': 'New York', 'country': 'US', 'lat': 40.7128, 'lon': -74.0060},
     {'city': 'Los Angeles', 'country': 'US', 'lat': 34.0522, 'lon': -118.2437},
@@ -57,154 +83,229 @@ DEVICES = [
     {'id': 'device-007', 'ip': '198.51.100.10', 'userAgent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:120.0)'}
 ]
 
+# Column-wise views of CITIES and DEVICES, indexed by the pre-drawn city/device numbers.
+# Tuples of plain Python values: indexing one is cheaper than a dict lookup and,
+# unlike an ndarray element, yields a value every JSON encoder accepts.
+CITY_NAMES = tuple(c['city'] for c in CITIES)
+CITY_COUNTRIES = tuple(c['country'] for c in CITIES)
+CITY_LAT = tuple(c['lat'] for c in CITIES)
+CITY_LON = tuple(c['lon'] for c in CITIES)
+
+DEVICE_IDS = tuple(d['id'] for d in DEVICES)
+DEVICE_IPS = tuple(d['ip'] for d in DEVICES)
+DEVICE_UAS = tuple(d['userAgent'] for d in DEVICES)
+
 
 # Track user patterns for generating ALLOW transactions
-user_devices = {}  # user -> device
-user_locations = {}  # user -> location
+user_devices = {}  # user -> device index
+user_locations = {}  # user -> city index
 user_ips = {}  # user -> ip
 
-def generate_transaction(transaction_type: str = 'random') -> Dict:
+@njit(cache=True)
+def _fill_numeric(type_roll, fixed_type, amount_roll, hours_roll, night_roll, night_hour,
+                  base_us, types, amounts, timestamps_us):
+    """
+    Fill the per-row transaction type, amount and timestamp from uniform [0, 1) draws
+    
+    Timestamps are microseconds since the Unix epoch, counted back from base_us.
+    """
+    for i in range(type_roll.shape[0]):
+        if fixed_type >= 0:
+            t = fixed_type
+        elif type_roll[i] < 0.5:  # 50% ALLOW
+            t = ALLOW
+        elif type_roll[i] < 0.8:  # 30% REVIEW
+            t = REVIEW
+        else:  # 20% BLOCK
+            t = BLOCK
+        types[i] = t
+        
+        if t == ALLOW:
+            amounts[i] = round(10.0 + amount_roll[i] * 170.0, 2)  # 10 - 180
+            ts = base_us - int(hours_roll[i] * 6.0 * HOUR_US)
+            # Daytime hours only: clamp to 06:00 - 22:59
+            day_start = ts - ts % DAY_US
+            hour = (ts - day_start) // HOUR_US
+            if hour < 6:
+                ts = day_start + 6 * HOUR_US + ts % 1_000_000
+            elif hour >= 23:
+                ts = day_start + 22 * HOUR_US + ts % 1_000_000
+        elif t == REVIEW:
+            amounts[i] = round(500.0 + amount_roll[i] * 500.0, 2)  # 500 - 1000
+            ts = base_us - int(hours_roll[i] * 6.0 * HOUR_US)
+            if night_roll[i] < 0.3:  # 30% chance of night time (0-5 AM)
+                ts = ts - ts % DAY_US + night_hour[i] * HOUR_US + ts % 1_000_000
+        else:
+            amounts[i] = round(1000.0 + amount_roll[i] * 14000.0, 2)  # 1000 - 15000
+            ts = base_us - int(hours_roll[i] * HOUR_US)  # Recent
+        timestamps_us[i] = ts
+
+
+def draw_random_values(count: int, rng: np.random.Generator, base_now: datetime,
+                       tx_type: str = 'random') -> Dict[str, List]:
+    """
+    Draw every random value needed for `count` transactions in one numpy call per field
+    
+    Args:
+        count: Number of transactions
+        rng: numpy random generator
+        base_now: UTC time that transaction timestamps are counted back from
+        tx_type: 'allow', 'review', 'block', or 'random' for a 50/30/20 mix
+    
+    Returns a dict of plain Python lists indexed by transaction number.
+    """
+    types = np.empty(count, dtype=np.int64)
+    amounts = np.empty(count, dtype=np.float64)
+    timestamps_us = np.empty(count, dtype=np.int64)
+    fixed_type = -1 if tx_type == 'random' else TYPE_CODES.get(tx_type, BLOCK)
+    base_us = (base_now - EPOCH) // timedelta(microseconds=1)
+    _fill_numeric(rng.random(count), fixed_type, rng.random(count), rng.random(count),
+                  rng.random(count), rng.integers(0, 6, size=count), base_us,
+                  types, amounts, timestamps_us)
+    # Format every timestamp in one call instead of a datetime/isoformat() per transaction
+    timestamps = np.char.add(np.datetime_as_string(timestamps_us.astype('datetime64[us]')), 'Z')
+    
+    draws = {
+        'type': types,
+        'amount': amounts,
+        'timestamp': timestamps,
+        'user': rng.integers(0, len(USERS), size=count),
+        'merchant': rng.integers(0, len(MERCHANTS), size=count),
+        'currency': rng.integers(0, len(CURRENCIES), size=count),
+        'device': rng.integers(0, len(DEVICES), size=count),
+        'city': rng.integers(0, len(CITIES), size=count),
+        'far_city': rng.integers(0, len(CITIES) - 1, size=count),
+        'new_device_roll': rng.random(count),
+        'lat_jitter': rng.uniform(-0.05, 0.05, size=count),
+        'lon_jitter': rng.uniform(-0.05, 0.05, size=count),
+    }
+    # Plain lists: element access is cheaper than on ndarrays and yields JSON-serializable values
+    return {name: values.tolist() for name, values in draws.items()}
+
+
+def generate_transaction(draws: Dict[str, List], i: int) -> Dict:
     """
     Generate a transaction
     
     Args:
-        transaction_type: 'allow', 'review', 'block', or 'random'
+        draws: Pre-drawn values from draw_random_values()
+        i: Index of this transaction into draws
     """
-    user = random.choice(USERS)
+    user = USERS[draws['user'][i]]
+    transaction_type = draws['type'][i]
+    amount = draws['amount'][i]
+    timestamp = draws['timestamp'][i]
     
     # For ALLOW transactions: reuse same device/IP/location for consistency
     # For BLOCK/REVIEW: use new devices/IPs and high amounts
-    pattern = random.random()
-    
-    if transaction_type == 'allow' or (transaction_type == 'random' and pattern < 0.5):
+    if transaction_type == ALLOW:
         # ALLOW transactions: low-risk, normal patterns
         # - Very low amount (< 200) to avoid any amount-based scoring
         # - Same device/IP for user (reuse to build history)
         # - Same location (not geo-impossible)
         # - Daytime (6 AM - 11 PM)
         # - Very spaced out (avoid burst)
-        amount = round(random.uniform(10, 180), 2)  # Very low to ensure < 1000
         
         # Reuse device/IP for this user (makes it "known" after first use)
         if user not in user_devices:
-            user_devices[user] = random.choice(DEVICES)
+            user_devices[user] = draws['device'][i]
         device = user_devices[user]
         
         if user not in user_ips:
-            user_ips[user] = device['ip']
+            user_ips[user] = DEVICE_IPS[device]
         
         # Reuse location for this user (same city)
         if user not in user_locations:
-            user_locations[user] = random.choice(CITIES)
-        location = user_locations[user]
+            user_locations[user] = draws['city'][i]
+        city = user_locations[user]
         
-        # Daytime hours (6 AM - 11 PM UTC)
-        hours_ago = random.uniform(0, 6)
-        base_time = datetime.utcnow() - timedelta(hours=hours_ago)
-        # Ensure it's between 6 AM and 11 PM
-        hour = base_time.hour
-        if hour < 6:
-            base_time = base_time.replace(hour=6, minute=0, second=0)
-        elif hour >= 23:
-            base_time = base_time.replace(hour=22, minute=0, second=0)
-        timestamp = base_time.isoformat() + 'Z'
-        
-    elif transaction_type == 'review' or (transaction_type == 'random' and pattern < 0.8):
+    elif transaction_type == REVIEW:
         # REVIEW transactions: medium-risk
         # - Medium amount (500-1000)
         # - Or new device/IP
         # - Or night time
-        amount = round(random.uniform(500, 1000), 2)
-        device = random.choice(DEVICES)
+        device = draws['device'][i]
         
         # Sometimes use new device/IP
-        if random.random() < 0.5:
+        if draws['new_device_roll'][i] < 0.5:
             user_devices[user] = device  # Mark as new
-            user_ips[user] = device['ip']
-        
-        location = random.choice(CITIES)
+            user_ips[user] = DEVICE_IPS[device]
         
-        # Sometimes night time
-        hours_ago = random.uniform(0, 6)
-        base_time = datetime.utcnow() - timedelta(hours=hours_ago)
-        if random.random() < 0.3:  # 30% chance of night time
-            hour = random.randint(0, 5)  # 0-5 AM
-            base_time = base_time.replace(hour=hour, minute=0, second=0)
-        timestamp = base_time.isoformat() + 'Z'
+        city = draws['city'][i]
         
     else:
         # BLOCK transactions: high-risk
         # - High amount (>= 1000)
         # - New device/IP
         # - Different location (geo-impossible)
-        amount = round(random.uniform(1000, 15000), 2)
-        device = random.choice(DEVICES)
+        device = draws['device'][i]
         user_devices[user] = device  # New device
-        user_ips[user] = device['ip']
+        user_ips[user] = DEVICE_IPS[device]
         
         # Different location (far from user's usual)
         if user in user_locations:
-            # Pick a far away city
+            # Pick a far away city: far_city is drawn from the other len(CITIES) - 1 cities,
+            # so step over the usual city's index
             usual_city = user_locations[user]
-            far_cities = [c for c in CITIES if c['city'] != usual_city['city']]
-            location = random.choice(far_cities) if far_cities else random.choice(CITIES)
+            city = draws['far_city'][i]
+            if city >= usual_city:
+                city += 1
         else:
-            location = random.choice(CITIES)
-            user_locations[user] = location
-        
-        hours_ago = random.uniform(0, 1)  # Recent
-        timestamp = (datetime.utcnow() - timedelta(hours=hours_ago)).isoformat() + 'Z'
+            city = draws['city'][i]
+            user_locations[user] = city
     
     return {
         'userId': user,
         'amount': amount,
-        'currency': random.choice(CURRENCIES),
-        'merchantId': random.choice(MERCHANTS),
+        'currency': CURRENCIES[draws['currency'][i]],
+        'merchantId': MERCHANTS[draws['merchant'][i]],
         'timestamp': timestamp,
         'location': {
-            'lat': location['lat'] + random.uniform(-0.05, 0.05),
-            'lon': location['lon'] + random.uniform(-0.05, 0.05),
-            'city': location['city'],
-            'country': location['country']
+            'lat': CITY_LAT[city] + draws['lat_jitter'][i],
+            'lon': CITY_LON[city] + draws['lon_jitter'][i],
+            'city': CITY_NAMES[city],
+            'country': CITY_COUNTRIES[city]
         },
         'device': {
-            'id': device['id'],
-            'ip': device['ip'],
-            'userAgent': device['userAgent']
+            'id': DEVICE_IDS[device],
+            'ip': DEVICE_IPS[device],
+            'userAgent': DEVICE_UAS[device]
         }
     }
 
 
-def send_transaction(tx: Dict) -> Dict:
-    """Send transaction to ingest API"""
+async def send_transaction(client: httpx.AsyncClient, tx: Dict) -> Dict:
+    """Send transaction to ingest API, reusing the client's keep-alive connections"""
     try:
-        data = json.dumps(tx).encode('utf-8')
-        req = urllib.request.Request(
-            f"{INGEST_API_URL}/transactions",
-            data=data,
-            headers={'Content-Type': 'application/json'},
-            method='POST'
+        data = orjson.dumps(tx) if orjson is not None else json.dumps(tx).encode('utf-8')
+        response = await client.post(
+            '/transactions',
+            content=data,
+            headers={'Content-Type': 'application/json'}
         )
         
-        with urllib.request.urlopen(req, timeout=5) as response:
-            status_code = response.getcode()
-            if status_code == 202:
-                tx_id = response.headers.get('X-Transaction-Id', 'N/A')
-                return {'success': True, 'transactionId': tx_id}
-            else:
-                body = response.read().decode('utf-8')
-                return {'success': False, 'error': body, 'status': status_code}
-    except urllib.error.HTTPError as e:
-        if e.code == 409:
+        if response.status_code == 202:
+            tx_id = response.headers.get('X-Transaction-Id', 'N/A')
+            return {'success': True, 'transactionId': tx_id}
+        elif response.status_code == 409:
             return {'success': False, 'error': 'Duplicate transaction', 'status': 409}
         else:
-            body = e.read().decode('utf-8') if e.fp else str(e)
-            return {'success': False, 'error': body, 'status': e.code}
+            return {'success': False, 'error': response.text, 'status': response.status_code}
     except Exception as e:
-        return {'success': False, 'error': str(e)}
+        return {'success': False, 'error': f"{type(e).__name__}: {e}"}
+
 
+async def dispatch(client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                   index: int, tx: Dict, start_at: float) -> tuple:
+    """Wait until start_at (event loop time), then send the transaction within the in-flight limit"""
+    delay = start_at - asyncio.get_running_loop().time()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    async with semaphore:
+        return index, tx, await send_transaction(client, tx)
 
-def main():
+
+async def main():
     # Parse arguments: [count] [delay_ms] [type]
     count = 50
     delay_ms = 200
@@ -241,42 +342,44 @@ def main():
     errors = []
     user_counts = {}
     
-    # For random mode, generate a mix: 50% ALLOW, 30% REVIEW, 20% BLOCK
-    for i in range(count):
-        if tx_type == 'random':
-            # Generate mix of transaction types
-            rand = random.random()
-            if rand < 0.5:
-                current_type = 'allow'
-            elif rand < 0.8:
-                current_type = 'review'
-            else:
-                current_type = 'block'
-        else:
-            current_type = tx_type
-        
-        tx = generate_transaction(current_type)
-        result = send_transaction(tx)
-        
-        # Add delay to avoid burst detection for ALLOW transactions
-        if current_type == 'allow' and delay_ms < 500:
-            time.sleep(0.5)  # At least 500ms between ALLOW transactions
-        
-        if result['success']:
-            success_count += 1
-            user_counts[tx['userId']] = user_counts.get(tx['userId'], 0) + 1
-            print(f"\r✓ {i+1}/{count} - {tx['userId']}: {tx['currency']} {tx['amount']:.2f}", end='', flush=True)
-        elif result.get('status') == 409:
-            duplicate_count += 1
-            print(f"\r⚠ {i+1}/{count} - Duplicate (skipped)", end='', flush=True)
-        else:
-            error_count += 1
-            errors.append({'index': i+1, 'error': result.get('error', 'Unknown'), 'status': result.get('status')})
-            print(f"\r✗ {i+1}/{count} - Error: {result.get('error', 'Unknown')[:30]}...", end='', flush=True)
+    # Requests are paced by delay_ms but no longer wait for the previous response;
+    # up to MAX_IN_FLIGHT of them share the client's keep-alive connection pool
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(MAX_IN_FLIGHT)
+    next_allow_at = {}  # user -> earliest start time of their next ALLOW transaction
+    limits = httpx.Limits(max_connections=MAX_IN_FLIGHT, max_keepalive_connections=MAX_IN_FLIGHT)
+    
+    # Every random value for the run, drawn up front in bulk
+    draws = draw_random_values(count, np.random.default_rng(), datetime.utcnow(), tx_type)
+    
+    async with httpx.AsyncClient(base_url=INGEST_API_URL, timeout=5, limits=limits) as client:
+        tasks = []
+        start = loop.time()
+        # For random mode, draw_random_values() picks a mix: 50% ALLOW, 30% REVIEW, 20% BLOCK
+        for i in range(count):
+            tx = generate_transaction(draws, i)
+            start_at = start + i * delay_ms / 1000.0
+            
+            # Space out each user's ALLOW transactions to avoid burst detection
+            if draws['type'][i] == ALLOW:
+                start_at = max(start_at, next_allow_at.get(tx['userId'], start_at))
+                next_allow_at[tx['userId']] = start_at + ALLOW_SPACING_S
+            
+            tasks.append(dispatch(client, semaphore, i, tx, start_at))
         
-        # Delay between requests
-        if i < count - 1 and delay_ms > 0:
-            time.sleep(delay_ms / 1000.0)
+        for done, completed in enumerate(asyncio.as_completed(tasks), 1):
+            i, tx, result = await completed
+            if result['success']:
+                success_count += 1
+                user_counts[tx['userId']] = user_counts.get(tx['userId'], 0) + 1
+                print(f"\r✓ {done}/{count} - {tx['userId']}: {tx['currency']} {tx['amount']:.2f}", end='', flush=True)
+            elif result.get('status') == 409:
+                duplicate_count += 1
+                print(f"\r⚠ {done}/{count} - Duplicate (skipped)", end='', flush=True)
+            else:
+                error_count += 1
+                errors.append({'index': i+1, 'error': result.get('error', 'Unknown'), 'status': result.get('status')})
+                print(f"\r✗ {done}/{count} - Error: {result.get('error', 'Unknown')[:30]}...", end='', flush=True)
     
     print("\n\n✅ Summary:")
     print(f"   Successful: {success_count}/{count}")
@@ -301,7 +404,7 @@ def main():
 
 if __name__ == '__main__':
     try:
-        main()
+        asyncio.run(main())
     except KeyboardInterrupt:
         print("\n\n⚠️  Interrupted by user")
         sys.exit(1)
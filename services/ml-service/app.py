@@ -6,12 +6,20 @@ import os
 import pickle
 import json
 import joblib
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from flask import Flask, request
 import logging
 
+try:
+    import orjson
+    JSONDecodeError = orjson.JSONDecodeError
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+    JSONDecodeError = json.JSONDecodeError
+
 app = Flask(__name__)
-CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -22,41 +30,134 @@ META_PATH = os.getenv('META_PATH', '/app/models/model_meta.json')
 model = None
 model_meta = None
 
+# Resolved once by load_model() so the request path never re-derives them
+EXPECTED_FEATURES = 0
+FEATURE_NAMES = ()
+MODEL_VERSION = None
+N_CLASSES = 2
+# Columns summed into fraud_probability: [fraud] for binary, [REVIEW, BLOCK] for multi-class
+FRAUD_SLICE = slice(1, 2)
+# Pre-rendered /predict response body with slots for the per-request numbers
+PREDICT_TEMPLATE = None
+
+@app.after_request
+def _cors(response):
+    """Allow all origins; a fixed header is all the open CORS policy needs"""
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    if request.method == 'OPTIONS':
+        response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    return response
+
+def _json_response(payload, status=200):
+    """Serialize payload to a JSON response, passing numpy values straight through to orjson"""
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        # ndarray.tolist() converts every element in one C loop
+        body = json.dumps(payload, default=lambda o: o.tolist())
+    return app.response_class(body, status=status, mimetype='application/json')
+
+def _parse_json_body():
+    """Parse the raw request body in one pass, without Flask's get_json() or keeping a cached copy"""
+    raw = request.get_data(cache=False)
+    return orjson.loads(raw) if orjson is not None else json.loads(raw)
+
 def load_model():
-    global model, model_meta
+    global model, model_meta, EXPECTED_FEATURES, FEATURE_NAMES, MODEL_VERSION, N_CLASSES, FRAUD_SLICE
+    global PREDICT_TEMPLATE
     try:
-        # Handle relative paths
-        import os
-        model_path = os.path.abspath(MODEL_PATH) if not os.path.isabs(MODEL_PATH) else MODEL_PATH
-        meta_path = os.path.abspath(META_PATH) if not os.path.isabs(META_PATH) else META_PATH
+        # Handle relative paths (abspath leaves absolute paths unchanged)
+        model_path = os.path.abspath(MODEL_PATH)
+        meta_path = os.path.abspath(META_PATH)
         
         logger.info(f"Loading model from {model_path}")
-        # Try joblib first (preferred for scikit-learn models), then pickle
-        try:
-            model = joblib.load(model_path)
-            logger.info("Model loaded successfully using joblib")
-        except Exception as joblib_error:
-            logger.warning(f"joblib load failed: {joblib_error}, trying pickle...")
+        if model_path.endswith(('.ubj', '.json')):
+            # XGBoost native format: parsed in C++, no Python object graph to rebuild
+            model = xgb.Booster()
+            model.load_model(model_path)
+            logger.info("Model loaded successfully using XGBoost native format")
+        else:
+            # Try joblib first (preferred for scikit-learn models), then pickle
             try:
-                with open(model_path, 'rb') as f:
-                    model = pickle.load(f)
-                logger.info("Model loaded successfully using pickle")
-            except Exception as pickle_error:
-                logger.error(f"Both joblib and pickle failed. Joblib: {joblib_error}, Pickle: {pickle_error}")
-                raise
+                model = joblib.load(model_path)
+                logger.info("Model loaded successfully using joblib")
+            except Exception as joblib_error:
+                logger.warning(f"joblib load failed: {joblib_error}, trying pickle...")
+                try:
+                    with open(model_path, 'rb') as f:
+                        model = pickle.load(f)
+                    logger.info("Model loaded successfully using pickle")
+                except Exception as pickle_error:
+                    logger.error(f"Both joblib and pickle failed. Joblib: {joblib_error}, Pickle: {pickle_error}")
+                    raise
+        
+        # Single-row requests are too small to benefit from XGBoost's thread pool, and
+        # gunicorn already runs workers x threads requests in parallel; letting each
+        # prediction fan out over every core as well would oversubscribe the CPUs
+        if isinstance(model, xgb.Booster):
+            model.set_param({'nthread': 1})
+        else:
+            # scikit-learn pipelines keep the classifier as their final step
+            estimator = model.steps[-1][1] if hasattr(model, 'steps') else model
+            if isinstance(estimator, xgb.XGBModel):
+                estimator.set_params(n_jobs=1)
         
         logger.info(f"Loading metadata from {meta_path}")
         with open(meta_path, 'r') as f:
             model_meta = json.load(f)
         logger.info(f"Metadata loaded: {model_meta['model_version']}")
+
+        EXPECTED_FEATURES = len(model_meta['features'])
+        FEATURE_NAMES = tuple(model_meta['features'])
+        MODEL_VERSION = model_meta['model_version']
+        N_CLASSES = _probe_n_classes()
+        FRAUD_SLICE = slice(1, 2) if N_CLASSES == 2 else slice(1, None)
+        # %.9g round-trips the float32 probabilities XGBoost produces
+        PREDICT_TEMPLATE = (
+            b'{"fraud_probability":%.9g,"prediction":%d,"probabilities":['
+            + b','.join([b'%.9g'] * N_CLASSES)
+            + b'],"model_version":'
+            + json.dumps(MODEL_VERSION).encode('utf-8').replace(b'%', b'%%')
+            + b'}'
+        )
+        logger.info(f"Model has {N_CLASSES} classes, expects {EXPECTED_FEATURES} features")
         return True
     except Exception as e:
         logger.error(f"Failed to load model: {e}", exc_info=True)
         return False
 
+def _predict_proba(rows):
+    """Return the (n_rows, n_classes) probability matrix for a list of raw feature rows"""
+    if isinstance(model, xgb.Booster):
+        # Raw boosters predict straight from a float32 array (XGBoost's internal precision)
+        # without building a DMatrix; binary objectives return only P(class 1)
+        probabilities = model.inplace_predict(np.asarray(rows, dtype=np.float32))
+        if probabilities.ndim == 1:
+            probabilities = np.column_stack((1.0 - probabilities, probabilities))
+        return probabilities
+    # Try pandas DataFrame first (many scikit-learn pipelines expect this). It is built
+    # from the raw values so categorical features such as currency keep their strings
+    try:
+        return model.predict_proba(pd.DataFrame(rows, columns=FEATURE_NAMES))
+    except Exception as e:
+        # Fallback to numpy array
+        logger.debug(f"DataFrame prediction failed: {e}, trying NumPy array...")
+        return model.predict_proba(np.asarray(rows, dtype=float))
+
+def _probe_n_classes():
+    """Number of probability columns the model returns, from classes_ or a dummy prediction"""
+    classes = getattr(model, 'classes_', None)
+    if classes is not None:
+        return len(classes)
+    try:
+        return _predict_proba(np.zeros((1, EXPECTED_FEATURES), dtype=np.float32)).shape[1]
+    except Exception as e:
+        logger.warning(f"Could not probe model output shape: {e}, assuming binary classifier")
+        return 2
+
 @app.route('/health', methods=['GET'])
 def health():
-    return jsonify({
+    return _json_response({
         'status': 'UP' if model is not None else 'DOWN',
         'model_loaded': model is not None,
         'model_version': model_meta.get('model_version') if model_meta else None
@@ -65,77 +166,94 @@ def health():
 @app.route('/predict', methods=['POST'])
 def predict():
     if model is None:
-        return jsonify({'error': 'Model not loaded'}), 503
+        return _json_response({'error': 'Model not loaded'}, 503)
+    
+    try:
+        data = _parse_json_body()
+    except JSONDecodeError as e:
+        return _json_response({'error': f'Invalid JSON body: {e}'}, 400)
     
     try:
-        data = request.get_json()
         features = data.get('features', [])
 
         logger.info(f"Received features: {features}")
         logger.info(f"Feature types: {[type(f) for f in features]}")
 
-        if len(features) != len(model_meta['features']):
-            return jsonify({
-                'error': f'Expected {len(model_meta["features"])} features, got {len(features)}',
-                'expected_features': model_meta['features']
-            }), 400
-
-        # Convert to numpy array and predict
-        import numpy as np
-        import pandas as pd
-
-        # Convert features to proper format
-        # Try pandas DataFrame first (many scikit-learn pipelines expect this)
-        try:
-            logger.info(f"Creating DataFrame with columns: {model_meta['features']}")
-            feature_df = pd.DataFrame([features], columns=model_meta['features'])
-            logger.info(f"DataFrame created: {feature_df}")
-            logger.info(f"DataFrame dtypes: {feature_df.dtypes}")
-            # Get prediction probabilities
-            probabilities = model.predict_proba(feature_df)
-            # Handle both 2D array (single row) and 1D array
-            if len(probabilities.shape) > 1:
-                probabilities = probabilities[0]
-            
-            # Get prediction class
-            prediction = model.predict(feature_df)
-            if hasattr(prediction, '__len__') and len(prediction) > 0:
-                prediction = prediction[0]
-        except Exception as e:
-            # Fallback to numpy array
-            logger.debug(f"DataFrame prediction failed: {e}, trying NumPy array...")
-            feature_array = np.array([features], dtype=float)
-            probabilities = model.predict_proba(feature_array)
-            if len(probabilities.shape) > 1:
-                probabilities = probabilities[0]
-            prediction = model.predict(feature_array)
-            if hasattr(prediction, '__len__') and len(prediction) > 0:
-                prediction = prediction[0]
+        if len(features) != EXPECTED_FEATURES:
+            return _json_response({
+                'error': f'Expected {EXPECTED_FEATURES} features, got {len(features)}',
+                'expected_features': FEATURE_NAMES
+            }, 400)
+
+        probabilities = _predict_proba([features])[0]
+        # The predicted class is the argmax of the probabilities; calling
+        # model.predict() would walk every tree a second time
+        prediction = np.argmax(probabilities).item()
         
         # For binary classification: [not_fraud_prob, fraud_prob]
-        # For multi-class: [ALLOW_prob, REVIEW_prob, BLOCK_prob]
-        if len(probabilities) == 2:
-            fraud_probability = float(probabilities[1])
-        else:
-            # Multi-class: fraud = REVIEW + BLOCK
-            fraud_probability = float(probabilities[1] + probabilities[2]) if len(probabilities) > 2 else float(probabilities[1])
+        # For multi-class: [ALLOW_prob, REVIEW_prob, BLOCK_prob], fraud = REVIEW + BLOCK
+        fraud_probability = probabilities[FRAUD_SLICE].sum().item()
         
-        return jsonify({
-            'fraud_probability': float(fraud_probability),
-            'prediction': int(prediction),
-            'probabilities': [float(p) for p in probabilities],
-            'model_version': model_meta['model_version']
+        if PREDICT_TEMPLATE is not None and len(probabilities) == N_CLASSES:
+            body = PREDICT_TEMPLATE % (fraud_probability, prediction, *probabilities.tolist())
+            return app.response_class(body, mimetype='application/json')
+        
+        return _json_response({
+            'fraud_probability': fraud_probability,
+            'prediction': prediction,
+            'probabilities': probabilities,
+            'model_version': MODEL_VERSION
         })
     except Exception as e:
         logger.error(f"Prediction error: {e}", exc_info=True)
-        return jsonify({'error': str(e)}), 500
+        return _json_response({'error': str(e)}, 500)
+
+@app.route('/predict_batch', methods=['POST'])
+def predict_batch():
+    """Score a batch of feature vectors with a single predict_proba call"""
+    if model is None:
+        return _json_response({'error': 'Model not loaded'}, 503)
+
+    try:
+        data = _parse_json_body()
+    except JSONDecodeError as e:
+        return _json_response({'error': f'Invalid JSON body: {e}'}, 400)
+
+    try:
+        batch = data.get('batch', [])
+
+        if not batch or any(not isinstance(row, list) or len(row) != EXPECTED_FEATURES for row in batch):
+            return _json_response({
+                'error': f'Expected a list of rows with {EXPECTED_FEATURES} features each',
+                'expected_features': FEATURE_NAMES
+            }, 400)
+
+        # One DataFrame / matrix for the whole batch, so the model is called once
+        probabilities = _predict_proba(batch)
+        fraud_probabilities = probabilities[:, FRAUD_SLICE].sum(axis=1)
+        predictions = np.argmax(probabilities, axis=1)
+
+        model_version = MODEL_VERSION
+        return _json_response([
+            {
+                'fraud_probability': fraud_probability,
+                'prediction': prediction,
+                'probabilities': row,
+                'model_version': model_version
+            }
+            for fraud_probability, prediction, row in zip(
+                fraud_probabilities.tolist(), predictions.tolist(), probabilities.tolist())
+        ])
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}", exc_info=True)
+        return _json_response({'error': str(e)}, 500)
 
 @app.route('/features', methods=['GET'])
 def get_features():
     """Return expected feature names and order"""
     if model_meta is None:
-        return jsonify({'error': 'Metadata not loaded'}), 503
-    return jsonify({
+        return _json_response({'error': 'Metadata not loaded'}, 503)
+    return _json_response({
         'features': model_meta['features'],
         'model_version': model_meta['model_version'],
         'block_threshold': model_meta.get('block_threshold'),
@@ -151,4 +269,10 @@ if __name__ == '__main__':
     else:
         logger.error("Failed to load model. Exiting.")
         exit(1)
+else:
+    # Load the model at import time so gunicorn (preload_app) loads it once in the master;
+    # forked workers share those pages copy-on-write, and inference never mutates them.
+    # Anything that must be created per worker belongs in gunicorn.conf.py's post_fork hook.
+    if not load_model():
+        raise RuntimeError("Failed to load model")
 
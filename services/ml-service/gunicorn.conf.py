@@ -0,0 +1,17 @@
+"""
+Gunicorn configuration for the ML service
+Runs several worker processes so concurrent /predict calls are served in parallel
+"""
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', 8084)}"
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', 4))
+
+# Import app.py (and so load the model) once in the master before forking, so all
+# workers share the model's memory copy-on-write instead of each holding a copy.
+# Per-worker state (threads, sockets, lazily initialised caches) must not be created
+# at import time; set it up in a post_fork(server, worker) hook here instead.
+preload_app = True
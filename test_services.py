@@ -34,11 +34,16 @@ def test_redis():
     """Test Redis connection"""
     try:
         import redis
-        r = redis.Redis(host='localhost', port=6379, decode_responses=True)
-        r.ping()
-        r.set('test_key', 'test_value')
-        value = r.get('test_key')
-        r.delete('test_key')
+        r = redis.Redis(host='localhost', port=6379, decode_responses=True, socket_keepalive=True)
+        # Send all four commands in a single round trip
+        with r.pipeline(transaction=False) as pipe:
+            pipe.ping()
+            pipe.set('test_key', 'test_value')
+            pipe.get('test_key')
+            pipe.delete('test_key')
+            _, _, value, _ = pipe.execute()
+        if value != 'test_value':
+            raise RuntimeError(f"read back {value!r} instead of 'test_value'")
         print("✓ Redis: Connected successfully")
         print(f"  Test read/write: OK")
         return True
@@ -53,32 +58,41 @@ def test_redis():
 def test_kafka():
     """Test Kafka connection"""
     try:
-        from kafka import KafkaProducer, KafkaConsumer, KafkaAdminClient
-        from kafka.admin import NewTopic
-        import json
+        from confluent_kafka import Producer
+        from confluent_kafka.admin import AdminClient
+        try:
+            import orjson
+            dumps = orjson.dumps
+        except ImportError:
+            import json
+            dumps = lambda v: json.dumps(v).encode('utf-8')
+
+        config = {'bootstrap.servers': 'localhost:9094'}
 
         # Test admin connection and list topics
-        admin = KafkaAdminClient(bootstrap_servers='localhost:9094')
-        topics = admin.list_topics()
+        admin = AdminClient(config)
+        topics = admin.list_topics(timeout=5).topics
         print("✓ Kafka: Connected successfully")
         print(f"  Available topics: {', '.join(topics)}")
 
         # Test producer
-        producer = KafkaProducer(
-            bootstrap_servers='localhost:9094',
-            value_serializer=lambda v: json.dumps(v).encode('utf-8')
-        )
+        producer = Producer(config)
+        delivery_errors = []
         test_message = {'test': 'message', 'timestamp': '2024-01-01'}
-        producer.send('payments.events', test_message)
-        producer.flush()
-        producer.close()
+        producer.produce(
+            'payments.events',
+            dumps(test_message),
+            on_delivery=lambda err, msg: err and delivery_errors.append(err)
+        )
+        undelivered = producer.flush(5)
+        if undelivered or delivery_errors:
+            raise RuntimeError(f"test message not delivered: {delivery_errors or 'flush timed out'}")
         print("  Test producer: OK")
 
-        admin.close()
         return True
     except ImportError:
-        print("✗ Kafka: kafka-python library not installed")
-        print("  Install with: pip install kafka-python")
+        print("✗ Kafka: confluent-kafka library not installed")
+        print("  Install with: pip install confluent-kafka")
         return False
     except Exception as e:
         print(f"✗ Kafka: Connection failed - {e}")